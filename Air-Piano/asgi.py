@@ -0,0 +1,123 @@
+"""ASGI entry point for production serving
+
+Run with a single worker, since the camera and all state are per process:
+
+    gunicorn -k uvicorn.workers.UvicornWorker -w 1 asgi:app
+    python asgi.py
+
+The video stream and the polled status routes are served natively on the
+event loop, so idle or slow viewers cost a coroutine rather than an OS
+thread. The camera, hand tracking and JPEG encoding run once on the shared
+frame thread in server.py, note-offs run on its audio thread, and the rest
+of the Flask routes run on a bounded WSGI thread pool.
+"""
+import os
+import asyncio
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+import server
+
+# Threads available to the remaining (short, possibly blocking) Flask routes
+WSGI_WORKERS = int(os.environ.get("AIRPIANO_WSGI_WORKERS", 8))
+
+
+class FrameBroadcast:
+    """Wakes every waiting viewer when the frame thread publishes a frame"""
+
+    def __init__(self):
+        self.loop = None
+        self.event = asyncio.Event()
+
+    def attach(self, loop):
+        self.loop = loop
+        server.frame_listeners.append(self.notify)
+
+    def detach(self):
+        if self.notify in server.frame_listeners:
+            server.frame_listeners.remove(self.notify)
+
+    def notify(self):
+        # Called on the frame thread
+        self.loop.call_soon_threadsafe(self._publish)
+
+    def _publish(self):
+        event, self.event = self.event, asyncio.Event()
+        event.set()
+
+    async def frames(self, rendition, auto):
+        """Yield the latest frame of a rendition each time a new one is published
+
+        A viewer that falls behind skips straight to the newest frame
+        instead of queueing old ones, and with `auto` is moved to a
+        cheaper rendition.
+        """
+        viewer = server.VideoViewer(rendition, auto)
+        try:
+            while True:
+                if not viewer.has_new():
+                    try:
+                        await asyncio.wait_for(self.event.wait(), timeout=1.0)
+                    except asyncio.TimeoutError:
+                        if not server.frame_loop_running():
+                            return
+                    continue
+                part = viewer.take()
+                if part is not None:
+                    yield part
+        finally:
+            viewer.close()
+
+
+broadcast = FrameBroadcast()
+
+
+async def video_feed(request):
+    """Return the video feed (?quality=full|high|medium|low|thumb, ?auto=0 to pin it)"""
+    try:
+        rendition, auto = server.video_feed_options(request.query_params)
+    except ValueError as e:
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=400)
+    return StreamingResponse(broadcast.frames(rendition, auto),
+                             media_type='multipart/x-mixed-replace; boundary=frame')
+
+
+async def get_active_chords(request):
+    """Return active chords and hands for the UI"""
+    return JSONResponse(server.active_chords_data())
+
+
+async def get_status(request):
+    """Get the current status of the system"""
+    return JSONResponse(server.status_data())
+
+
+@asynccontextmanager
+async def lifespan(app):
+    broadcast.attach(asyncio.get_running_loop())
+    try:
+        yield
+    finally:
+        broadcast.detach()
+
+
+app = Starlette(
+    routes=[
+        Route('/video_feed', video_feed),
+        Route('/active_chords', get_active_chords),
+        Route('/get_status', get_status, methods=['GET']),
+        Mount('/', app=WSGIMiddleware(server.app, workers=WSGI_WORKERS)),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+    server.logger.info("AirPiano ASGI server starting...")
+    port = int(os.environ.get("PORT", 5000))
+    uvicorn.run(app, host='0.0.0.0', port=port, workers=1)
@@ -0,0 +1,143 @@
+import threading
+import numpy as np
+
+from onset import HAND_SLOTS
+
+
+class FingerStateFilter:
+    """Debounce finger states per hand and hold hands across brief dropouts
+
+    A finger changes state only when `required` of the last `window` raw
+    fingersUp() readings disagree with its current state, including the
+    newest two, so single-frame flicker at the detection threshold is
+    ignored. On a change the finger's window is refilled with the new state,
+    so readings from before it never count towards the next vote and input
+    that alternates every frame holds still. With the default 2-of-3 a clean
+    transition is delayed by one frame. A hand that disappears keeps
+    its state for `grace_time` seconds; after that it is reported released.
+    New hands start with every finger down and go through the same vote, so
+    a one-frame false detection plays nothing. window=1, required=1 passes
+    raw states straight through.
+    """
+
+    def __init__(self, window=3, required=2, grace_time=0.15):
+        self.grace_time = grace_time
+        self._lock = threading.RLock()  # Settings change on request threads
+        self.window, self.required = self._validate(window, required)
+        self.reset()
+        self.reset_stats()
+
+    @staticmethod
+    def _validate(window, required):
+        window, required = int(window), int(required)
+        if not window // 2 < required <= window:
+            raise ValueError(f"required must be a majority of window, got {required} of {window}")
+        return window, required
+
+    def configure(self, window, required):
+        """Change the vote; finger states and held hands carry over"""
+        window, required = self._validate(window, required)
+        with self._lock:
+            self.window = window
+            self.required = required
+            self.history = np.repeat(self.state[:, None, :], window, axis=1)
+            self.position[:] = 0
+
+    def reset(self):
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self.history = np.zeros((2, self.window, 5), dtype=bool)
+        self.position = np.zeros(2, dtype=int)
+        self.state = np.zeros((2, 5), dtype=bool)
+        self.raw = np.zeros((2, 5), dtype=bool)
+        self.tracked = np.zeros(2, dtype=bool)
+        self.present = np.zeros(2, dtype=bool)
+        self.last_seen = np.full(2, -np.inf)
+
+    def reset_stats(self):
+        """Zero the counters; reset() leaves them running across sessions"""
+        self.stats = {
+            "raw_transitions": 0,
+            "state_changes": 0,
+            "suppressed_transitions": 0,
+            "dropouts_bridged": 0,
+            "hands_released": 0,
+        }
+
+    def update(self, raw, present, t, latch=None):
+        """Advance one frame of (2, 5) raw finger states by hand slot
+
+        `latch` marks fingers confirmed up by another source (the onset
+        predictor); they switch to up at once instead of waiting for the
+        vote. Returns the filtered (2, 5) states and a (2,) mask of hands
+        whose grace period ran out on this frame.
+        """
+        with self._lock:
+            return self._update(raw, present, t, latch)
+
+    def _update(self, raw, present, t, latch):
+        raw = np.asarray(raw, dtype=bool)
+        present = np.asarray(present, dtype=bool)
+
+        # Hands that were not being tracked start all down and have to win the vote
+        new = present & ~self.tracked
+        self.history[new] = False
+        self.position[new] = 0
+        self.state[new] = False
+        self.raw[new] = False
+
+        self.stats["dropouts_bridged"] += int((present & self.tracked & ~self.present).sum())
+        self.history[present, self.position[present]] = raw[present]
+        self.position[present] = (self.position[present] + 1) % self.window
+
+        up_votes = self.history.sum(axis=1)
+        newest = (self.position[:, None] - 1 - np.arange(min(self.required, 2))) % self.window
+        settled = (self.history[np.arange(2)[:, None], newest] != self.state[:, None, :]).all(axis=1)
+        changed = present[:, None] & settled & np.where(
+            self.state,
+            self.window - up_votes >= self.required,
+            up_votes >= self.required,
+        )
+        if latch is not None:
+            latched = present[:, None] & np.asarray(latch, dtype=bool) & ~self.state & ~changed
+            changed |= latched
+        self.state ^= changed
+        # Start the window over at the new state so the next change needs a fresh vote
+        self.history = np.where(changed[:, None, :], self.state[:, None, :], self.history)
+        self.stats["raw_transitions"] += int((present[:, None] & (raw != self.raw)).sum())
+        self.stats["state_changes"] += int(changed.sum())
+        self.stats["suppressed_transitions"] = max(
+            self.stats["raw_transitions"] - self.stats["state_changes"], 0)
+        self.raw[present] = raw[present]
+
+        self.last_seen[present] = t
+        released = self.tracked & ~present & (t - self.last_seen > self.grace_time)
+        self.state[released] = False
+        self.tracked = (self.tracked & ~released) | present
+        self.present = present
+        self.stats["hands_released"] += int(released.sum())
+        return self.state.copy(), released
+
+    def update_hands(self, hands, fingers, t, latch=None):
+        """Advance with cvzone hand dicts and their fingersUp() lists
+
+        Returns the filtered fingers per hand and the released hand slots.
+        Only the first hand of each type is filtered; others pass through.
+        """
+        raw = np.zeros((2, 5), dtype=bool)
+        present = np.zeros(2, dtype=bool)
+        slots = []
+        for hand, finger_bits in zip(hands, fingers):
+            slot = HAND_SLOTS.get(hand["type"])
+            if slot is None or present[slot]:
+                slots.append(None)
+                continue
+            raw[slot] = finger_bits
+            present[slot] = True
+            slots.append(slot)
+        state, released = self.update(raw, present, t, latch)
+        filtered = [finger_bits if slot is None else state[slot].astype(int).tolist()
+                    for finger_bits, slot in zip(fingers, slots)]
+        return filtered, np.flatnonzero(released).tolist()
@@ -0,0 +1,210 @@
+import argparse
+import threading
+import numpy as np
+
+from recording import HAND_LEFT, HAND_RIGHT, load_landmark_log, fingers_from_mask
+
+# Landmark ids of the fingertips (thumb ... pinky), as used by cvzone fingersUp()
+TIP_IDS = np.array([4, 8, 12, 16, 20])
+
+# Hand slots used by the predictor, indexed by HAND_LEFT / HAND_RIGHT
+HAND_SLOTS = {"Left": HAND_LEFT, "Right": HAND_RIGHT}
+
+# fingersUp() compares the thumb tip to its IP joint along x, with the sign
+# depending on handedness, and the other tips to their PIP joints along y
+_THUMB_SIGN = np.array([-1.0, 1.0])
+
+
+def finger_margins(lm):
+    """Signed distance of each finger past the fingersUp() threshold
+
+    lm is an (hands, 21, 3) array ordered by hand slot. Positive means the
+    finger reads as up. Margins are in hand lengths (wrist to middle MCP) so
+    velocities do not depend on how close the hand is to the camera.
+    """
+    lm = np.asarray(lm, dtype=np.float64)
+    margins = np.empty(lm.shape[:1] + (5,))
+    margins[:, 0] = _THUMB_SIGN[:lm.shape[0]] * (lm[:, 4, 0] - lm[:, 3, 0])
+    margins[:, 1:] = lm[:, TIP_IDS[1:] - 2, 1] - lm[:, TIP_IDS[1:], 1]
+    scale = np.hypot(*(lm[:, 9, :2] - lm[:, 0, :2]).T)
+    return margins / np.maximum(scale, 1.0)[:, None]
+
+
+class OnsetPredictor:
+    """Predict finger-up transitions from fingertip velocity
+
+    Tracks every finger of both hand slots at once. A finger that is still
+    down but whose projected margin crosses the threshold within `lookahead`
+    seconds is reported as up early. If the real transition does not follow
+    within `cancel_window` seconds the prediction is dropped and counted as a
+    false trigger.
+    """
+
+    def __init__(self, lookahead=0.033, cancel_window=0.1, min_velocity=1.0, smoothing=0.5):
+        self.lookahead = lookahead
+        self.cancel_window = cancel_window
+        self.min_velocity = min_velocity  # Hand lengths per second
+        self.smoothing = smoothing
+        self._lock = threading.RLock()  # Settings change on request threads
+        self.reset()
+        self.reset_stats()
+
+    def configure(self, lookahead=None, cancel_window=None):
+        with self._lock:
+            if lookahead is not None:
+                self.lookahead = lookahead
+            if cancel_window is not None:
+                self.cancel_window = cancel_window
+
+    def reset(self):
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self.margin = np.zeros((2, 5))
+        self.velocity = np.zeros((2, 5))
+        self.present = np.zeros(2, dtype=bool)
+        self.last_t = np.full(2, np.nan)
+        self.pending_since = np.full((2, 5), np.nan)
+        self.confirmed = np.zeros((2, 5), dtype=bool)  # Predictions confirmed on the last frame
+
+    def reset_stats(self):
+        """Zero the counters; reset() leaves them running across sessions"""
+        self.stats = {"predicted": 0, "confirmed": 0, "cancelled": 0}
+
+    def update(self, lm, present, t):
+        """Advance one frame of a (2, 21, 3) landmark array by hand slot
+
+        Rows where `present` is False are ignored. Returns a (2, 5) mask of
+        predicted-up fingers and a (2, 5) mask of predictions cancelled on
+        this frame, whose chords should be stopped at once.
+        """
+        with self._lock:
+            return self._update(lm, present, t)
+
+    def _update(self, lm, present, t):
+        present = np.asarray(present, dtype=bool)
+        margin = finger_margins(lm)
+        dt = t - self.last_t
+        tracked = present & self.present & (dt > 0)
+
+        raw_velocity = (margin - self.margin) / np.where(tracked, dt, 1.0)[:, None]
+        self.velocity = np.where(
+            tracked[:, None],
+            self.smoothing * self.velocity + (1 - self.smoothing) * raw_velocity,
+            0.0,
+        )
+
+        up = margin > 0
+        pending = ~np.isnan(self.pending_since)
+        onset = (tracked[:, None] & ~up & ~pending
+                 & (self.velocity > self.min_velocity)
+                 & (margin + self.velocity * self.lookahead > 0))
+        self.pending_since[onset] = t
+        self.stats["predicted"] += int(onset.sum())
+
+        pending = ~np.isnan(self.pending_since)
+        confirmed = pending & up & present[:, None]
+        expired = pending & ~confirmed & (
+            ~present[:, None] | (t - self.pending_since > self.cancel_window))
+        self.stats["confirmed"] += int(confirmed.sum())
+        self.stats["cancelled"] += int(expired.sum())
+        self.pending_since[confirmed | expired] = np.nan
+        self.confirmed = confirmed
+
+        self.margin = np.where(present[:, None], margin, self.margin)
+        self.last_t = np.where(present, t, self.last_t)
+        self.present = present
+        return ~np.isnan(self.pending_since), expired
+
+    def update_hands(self, hands, t):
+        """Advance with cvzone hand dicts
+
+        Returns a predicted mask per hand and the (2, 5) cancelled mask by
+        hand slot. Only the first hand of each type is tracked; other hands
+        get None.
+        """
+        lm = np.zeros((2, 21, 3))
+        present = np.zeros(2, dtype=bool)
+        slots = []
+        for hand in hands:
+            slot = HAND_SLOTS.get(hand["type"])
+            if slot is None or present[slot]:
+                slots.append(None)
+                continue
+            lm[slot] = hand["lmList"]
+            present[slot] = True
+            slots.append(slot)
+        predicted, cancelled = self.update(lm, present, t)
+        return [None if slot is None else predicted[slot] for slot in slots], cancelled
+
+
+# Replay a landmark log and measure how much earlier onsets are reported
+def evaluate_log(records, predictor=None):
+    predictor = predictor or OnsetPredictor()
+    predictor.reset()
+    predictor.reset_stats()
+    frames, starts = np.unique(records["frame"], return_index=True)
+    bounds = np.append(starts, len(records))
+
+    prev_up = np.zeros((2, 5), dtype=bool)
+    prev_predicted = np.zeros((2, 5), dtype=bool)
+    predicted_at = np.full((2, 5), np.nan)
+    actual_onsets = 0
+    gains = []
+
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        frame = records[start:end]
+        t = float(frame["t"][0])
+        lm = np.zeros((2, 21, 3))
+        up = np.zeros((2, 5), dtype=bool)
+        present = np.zeros(2, dtype=bool)
+        for record in frame:
+            slot = int(record["hand"])
+            if slot in (HAND_LEFT, HAND_RIGHT) and not present[slot]:
+                lm[slot] = record["lm"]
+                up[slot] = fingers_from_mask(record["fingers"]).astype(bool)
+                present[slot] = True
+
+        predicted, _ = predictor.update(lm, present, t)
+        predicted_at[predicted & ~prev_predicted] = t
+
+        onset = up & ~prev_up
+        actual_onsets += int(onset.sum())
+        hit = onset & ~np.isnan(predicted_at)
+        gains.extend((t - predicted_at[hit]).tolist())
+        predicted_at[~predicted] = np.nan
+
+        prev_up = up & present[:, None]
+        prev_predicted = predicted
+
+    stats = predictor.stats
+    duration = float(records["t"][-1] - records["t"][0]) if len(records) else 0.0
+    frame_time = duration / max(len(frames) - 1, 1)
+    return {
+        "frames": int(len(frames)),
+        "actual_onsets": actual_onsets,
+        "predicted_onsets": stats["predicted"],
+        "early_onsets": len(gains),
+        "false_triggers": stats["cancelled"],
+        "false_trigger_rate": stats["cancelled"] / stats["predicted"] if stats["predicted"] else 0.0,
+        "mean_gain_ms": 1000 * float(np.mean(gains)) if gains else 0.0,
+        "mean_gain_frames": float(np.mean(gains)) / frame_time if gains and frame_time else 0.0,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure onset prediction on recorded landmark logs")
+    parser.add_argument("logs", nargs="+", help="Landmark logs (.lmlog) from /start_recording")
+    parser.add_argument("--lookahead", type=float, default=0.033)
+    parser.add_argument("--cancel-window", type=float, default=0.1)
+    parser.add_argument("--min-velocity", type=float, default=1.0)
+    args = parser.parse_args()
+
+    for path in args.logs:
+        predictor = OnsetPredictor(args.lookahead, args.cancel_window, args.min_velocity)
+        report = evaluate_log(load_landmark_log(path), predictor)
+        print(f"{path}: {report['early_onsets']}/{report['actual_onsets']} onsets early, "
+              f"mean gain {report['mean_gain_ms']:.1f} ms ({report['mean_gain_frames']:.2f} frames), "
+              f"false triggers {report['false_triggers']}/{report['predicted_onsets']} "
+              f"({100 * report['false_trigger_rate']:.1f}%)")
@@ -0,0 +1,224 @@
+import os
+import abc
+import queue
+import struct
+import threading
+import time
+import logging
+import numpy as np
+
+logger = logging.getLogger('airpiano')
+
+# MIDI file timing: 480 ticks per quarter note at 120 BPM = 960 ticks per second
+TICKS_PER_BEAT = 480
+TEMPO_US_PER_BEAT = 500000
+TICKS_PER_SECOND = TICKS_PER_BEAT * 1000000 / TEMPO_US_PER_BEAT
+
+# Handedness codes stored in the landmark log
+HAND_LEFT = 0
+HAND_RIGHT = 1
+HAND_NONE = 255  # Frame had no hands; keeps detection dropouts visible on replay
+
+# One fixed-size record per detected hand per frame (140 bytes, no header),
+# so a log file can be opened directly with np.memmap / load_landmark_log()
+LANDMARK_DTYPE = np.dtype([
+    ("t", "<f8"),             # Seconds since recording start
+    ("frame", "<u4"),         # Frame index since recording start
+    ("hand", "u1"),           # HAND_LEFT, HAND_RIGHT or HAND_NONE
+    ("fingers", "u1"),        # fingersUp() bitmask, bit 0 = thumb ... bit 4 = pinky
+    ("lm", "<i2", (21, 3)),   # hand["lmList"] pixel coordinates (x, y, z)
+])
+
+
+# Encode an integer as a MIDI variable-length quantity
+def _vlq(value):
+    out = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        out.insert(0, (value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(out)
+
+
+class _BackgroundWriter(abc.ABC):
+    """Queue-fed file writer; callers never touch the disk"""
+
+    def __init__(self, path, buffering=1 << 16):
+        self.path = path
+        self.closed = False
+        self._queue = queue.SimpleQueue()
+        self._file = open(path, "wb", buffering=buffering)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        if not self.closed:
+            self._queue.put(item)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write(item)
+            except Exception as e:
+                logger.error(f"Error writing {self.path}: {e}")
+        try:
+            self._finish()
+        finally:
+            self._file.close()
+
+    @abc.abstractmethod
+    def _write(self, item):
+        """Write one queued item (runs on the writer thread)"""
+
+    def _finish(self):
+        pass
+
+    def close(self):
+        """Flush pending items and close the file"""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+
+class MidiFileWriter(_BackgroundWriter):
+    """Single-track Standard MIDI File (format 0) of timestamped note events"""
+
+    def __init__(self, path, start_time, channel=0, program=0):
+        super().__init__(path)
+        self.start_time = start_time
+        self.channel = channel
+        self._last_tick = 0
+        self._sounding = set()  # Notes on without a note-off yet
+        self._stop_time = None
+
+        self._file.write(b"MThd" + struct.pack(">IHHH", 6, 0, 1, TICKS_PER_BEAT))
+        self._file.write(b"MTrk")
+        self._length_offset = self._file.tell()
+        self._file.write(struct.pack(">I", 0))  # Patched in _finish()
+        self._track_length = 0
+        self._emit(0, b"\xff\x51\x03" + TEMPO_US_PER_BEAT.to_bytes(3, "big"))
+        self._emit(0, bytes([0xC0 | channel, program & 0x7F]))
+
+    def note_on(self, notes, velocity, t=None):
+        self._put((time.perf_counter() if t is None else t, 0x90, tuple(notes), velocity))
+
+    def note_off(self, notes, t=None):
+        self._put((time.perf_counter() if t is None else t, 0x80, tuple(notes), 0))
+
+    def program_change(self, program, t=None):
+        self._put((time.perf_counter() if t is None else t, 0xC0, (program,), None))
+
+    def _emit(self, delta, data):
+        chunk = _vlq(delta) + data
+        self._file.write(chunk)
+        self._track_length += len(chunk)
+
+    def _write(self, item):
+        t, status, values, velocity = item
+        # Absolute ticks keep rounding error from accumulating across events
+        tick = max(self._last_tick, int(round((t - self.start_time) * TICKS_PER_SECOND)))
+        delta = tick - self._last_tick
+        self._last_tick = tick
+        if status == 0x90:
+            self._sounding.update(values)
+        elif status == 0x80:
+            self._sounding.difference_update(values)
+        status |= self.channel
+        for value in values:
+            if velocity is None:
+                self._emit(delta, bytes([status, value & 0x7F]))
+            else:
+                self._emit(delta, bytes([status, value & 0x7F, velocity & 0x7F]))
+            delta = 0
+
+    def _finish(self):
+        # Notes still held or waiting out their sustain end with the recording
+        if self._sounding:
+            self._write((self._stop_time, 0x80, tuple(sorted(self._sounding)), 0))
+        self._emit(0, b"\xff\x2f\x00")  # End of track
+        self._file.seek(self._length_offset)
+        self._file.write(struct.pack(">I", self._track_length))
+
+    def close(self):
+        if self._stop_time is None:
+            self._stop_time = time.perf_counter()
+        super().close()
+
+
+class LandmarkLogWriter(_BackgroundWriter):
+    """Append-only log of LANDMARK_DTYPE records"""
+
+    def __init__(self, path, start_time):
+        super().__init__(path)
+        self.start_time = start_time
+        self.frames = 0
+
+    def append(self, hands, fingers, t=None):
+        """Log one frame: cvzone hand dicts and their fingersUp() lists"""
+        if self.closed:
+            return
+        t = time.perf_counter() if t is None else t
+        records = np.zeros(max(len(hands), 1), dtype=LANDMARK_DTYPE)
+        records["t"] = t - self.start_time
+        records["frame"] = self.frames
+        if not hands:
+            records["hand"] = HAND_NONE
+        for i, (hand, finger_bits) in enumerate(zip(hands, fingers)):
+            records["hand"][i] = HAND_LEFT if hand["type"] == "Left" else HAND_RIGHT
+            records["fingers"][i] = sum(bit << j for j, bit in enumerate(finger_bits))
+            records["lm"][i] = hand["lmList"]
+        self.frames += 1
+        self._put(records)
+
+    def _write(self, item):
+        self._file.write(item.tobytes())
+
+
+def load_landmark_log(path, mode="r"):
+    """Memory-map a landmark log as a structured array of LANDMARK_DTYPE
+
+    A partial record at the end (left by an unclean exit) is ignored.
+    """
+    count = os.path.getsize(path) // LANDMARK_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=LANDMARK_DTYPE)
+    return np.memmap(path, dtype=LANDMARK_DTYPE, mode=mode, shape=(count,))
+
+
+def fingers_from_mask(mask):
+    """Expand fingers bitmasks back into fingersUp()-style 0/1 columns"""
+    return (np.asarray(mask)[..., None] >> np.arange(5)) & 1
+
+
+class RecordingSession:
+    """MIDI + landmark recording written under a common base name"""
+
+    def __init__(self, directory, program=0):
+        os.makedirs(directory, exist_ok=True)
+        # Suffix a counter so a restart within the same second keeps the earlier files
+        base = time.strftime("airpiano-%Y%m%d-%H%M%S")
+        self.name, counter = base, 1
+        while (os.path.exists(os.path.join(directory, self.name + ".mid"))
+               or os.path.exists(os.path.join(directory, self.name + ".lmlog"))):
+            counter += 1
+            self.name = f"{base}-{counter}"
+        self.started = time.time()
+        start = time.perf_counter()
+        self.midi_path = os.path.join(directory, self.name + ".mid")
+        self.landmarks_path = os.path.join(directory, self.name + ".lmlog")
+        self.midi = MidiFileWriter(self.midi_path, start, program=program)
+        self.landmarks = LandmarkLogWriter(self.landmarks_path, start)
+
+    def stop(self):
+        self.midi.close()
+        self.landmarks.close()
+        return {
+            "name": self.name,
+            "duration": round(time.time() - self.started, 2),
+            "frames": self.landmarks.frames,
+        }
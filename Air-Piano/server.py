@@ -1,5 +1,5 @@
 import os
-from flask import Flask, render_template, Response, jsonify, request
+from flask import Flask, render_template, Response, jsonify, request, send_file
 import cv2
 import threading
 import base64
@@ -8,6 +8,10 @@ import json
 import numpy as np
 from cvzone.HandTrackingModule import HandDetector
 import logging
+import heapq
+from recording import RecordingSession
+from onset import OnsetPredictor
+from finger_filter import FingerStateFilter
 
 # Add FluidSynth integration for better sound quality
 try:
@@ -37,7 +41,13 @@ camera_data = {
 settings = {
     "sustain_time": 2.0,
     "sensitivity": 0.8,
-    "volume": 100
+    "volume": 100,
+    "onset_prediction": False,
+    "onset_lookahead": 0.033,
+    "onset_cancel_window": 0.1,
+    "filter_window": 3,
+    "filter_required": 2,
+    "hand_grace_time": 0.15
 }
 
 # Track performance metrics
@@ -49,6 +59,17 @@ performance_metrics = {
     "session_duration": 0
 }
 
+# Session recording (MIDI + landmark log), None when not recording
+recording = None
+last_recording = None
+RECORDINGS_DIR = os.environ.get("AIRPIANO_RECORDINGS_DIR", "recordings")
+
+# Predicts finger onsets from fingertip velocity when settings["onset_prediction"] is on
+onset_predictor = OnsetPredictor(settings["onset_lookahead"], settings["onset_cancel_window"])
+
+# Debounces finger states and holds hands across brief detection dropouts
+finger_filter = FingerStateFilter(settings["filter_window"], settings["filter_required"], settings["hand_grace_time"])
+
 # Available soundfonts - add path to any soundfonts you have
 soundfonts = {
     "default": None,  # Will use pygame default
@@ -225,6 +246,13 @@ def play_chord(chord_notes, chord_name=None):
         logger.warning("Sound system not initialized, can't play chord")
         return
     
+    # A chord struck again while sustaining keeps sounding past its old note-off
+    cancel_pending_stops(chord_notes)
+    
+    rec = recording
+    if rec is not None:
+        rec.midi.note_on(chord_notes, volume)
+    
     # Add to active chords list for UI display
     if chord_name and chord_name not in active_chords:
         active_chords.append(chord_name)
@@ -232,12 +260,50 @@ def play_chord(chord_notes, chord_name=None):
     
     logger.debug(f"Played chord: {chord_name} - Notes: {chord_notes}")
 
+# Pending note-offs as a heap of (due time, sequence, notes, name)
+pending_stops = []
+pending_stops_condition = threading.Condition()
+pending_stops_seq = 0
+
 # Function to Stop a Chord After a Delay
 def stop_chord_after_delay(chord_notes, chord_name=None):
+    """Schedule a chord stop after the sustain time without blocking the caller"""
+    global pending_stops_seq
+    due = time.monotonic() + settings["sustain_time"]  # Sustain for specified time
+    with pending_stops_condition:
+        pending_stops_seq += 1
+        heapq.heappush(pending_stops, (due, pending_stops_seq, chord_notes, chord_name))
+        pending_stops_condition.notify()
+
+# Function to Drop Scheduled Stops of a Chord
+def cancel_pending_stops(chord_notes):
+    with pending_stops_condition:
+        kept = [stop for stop in pending_stops if list(stop[2]) != list(chord_notes)]
+        if len(kept) != len(pending_stops):
+            pending_stops[:] = kept
+            heapq.heapify(pending_stops)
+            pending_stops_condition.notify()
+
+# Audio thread that sends scheduled note-offs when they fall due
+def chord_stop_worker():
+    while True:
+        with pending_stops_condition:
+            while not pending_stops or pending_stops[0][0] > time.monotonic():
+                timeout = pending_stops[0][0] - time.monotonic() if pending_stops else None
+                pending_stops_condition.wait(timeout)
+            _, _, chord_notes, chord_name = heapq.heappop(pending_stops)
+        try:
+            stop_chord(chord_notes, chord_name)
+        except Exception as e:
+            logger.error(f"Error stopping chord {chord_name}: {e}")
+
+chord_stop_thread = threading.Thread(target=chord_stop_worker, name="airpiano-audio", daemon=True)
+chord_stop_thread.start()
+
+# Function to Stop a Chord
+def stop_chord(chord_notes, chord_name=None):
     global active_chords, player, fs, USE_FLUIDSYNTH
     
-    time.sleep(settings["sustain_time"])  # Sustain for specified time
-    
     if USE_FLUIDSYNTH and fs is not None:
         for note in chord_notes:
             fs.noteoff(0, note)
@@ -245,10 +311,57 @@ def stop_chord_after_delay(chord_notes, chord_name=None):
         for note in chord_notes:
             player.note_off(note, 0)
     
+    rec = recording
+    if rec is not None:
+        rec.midi.note_off(chord_notes)
+    
     # Remove from active chords list for UI display
     if chord_name and chord_name in active_chords:
         active_chords.remove(chord_name)
 
+# Function to Stop all Chords Held by a Hand
+def release_hand_chords(hand_type):
+    for finger_name in finger_indices:
+        if finger_name in single_chords[hand_type]:
+            if prev_states["single"][hand_type][finger_name] == 1:
+                chord_data = single_chords[hand_type][finger_name]
+                stop_chord_after_delay(chord_data["notes"], chord_data["name"])
+                prev_states["single"][hand_type][finger_name] = 0
+    
+    for combo_name in finger_pairs:
+        if combo_name in combo_chords[hand_type]:
+            if prev_states["combo"][hand_type][combo_name] == 1:
+                combo_data = combo_chords[hand_type][combo_name]
+                stop_chord_after_delay(combo_data["notes"], combo_data["name"])
+                prev_states["combo"][hand_type][combo_name] = 0
+
+# Chords started on a predicted onset alone, with the fingers still unconfirmed
+predicted_chords = {}
+
+# Function to Forget Predicted Chords whose Fingers came up or that stopped
+def confirm_predicted_chords(hand_type, fingers):
+    for key, pending in list(predicted_chords.items()):
+        kind, chord_hand, name = key
+        if chord_hand != hand_type:
+            continue
+        pending = {idx for idx in pending if not fingers[idx]}
+        if not pending or prev_states[kind][hand_type][name] == 0:
+            del predicted_chords[key]
+        else:
+            predicted_chords[key] = pending
+
+# Function to Silence Chords whose Predicted Onset was Cancelled
+def cancel_predicted_chords(hand_type, cancelled):
+    for key, pending in list(predicted_chords.items()):
+        kind, chord_hand, name = key
+        if chord_hand != hand_type or not any(cancelled[idx] for idx in pending):
+            continue
+        chords = single_chords if kind == "single" else combo_chords
+        chord_data = chords[hand_type][name]
+        stop_chord(chord_data["notes"], chord_data["name"])  # No sustain for a false trigger
+        prev_states[kind][hand_type][name] = 0
+        del predicted_chords[key]
+
 # Function to Initialize Camera
 def initialize_camera():
     global cap, detector
@@ -275,14 +388,219 @@ def initialize_camera():
         logger.error(f"Error initializing camera: {e}")
         return False
 
-# Function to Generate Camera Frames
-def generate_frames():
-    global tracking_active, active_hands, performance_metrics
+# Video renditions, best first. Viewers that fall behind move down this list.
+video_renditions = {
+    "full": {"scale": 1.0, "quality": 90, "fps": 30},
+    "high": {"scale": 1.0, "quality": 75, "fps": 30},
+    "medium": {"scale": 0.5, "quality": 75, "fps": 30},
+    "low": {"scale": 0.5, "quality": 50, "fps": 15},
+    "thumb": {"scale": 0.25, "quality": 50, "fps": 5}
+}
+rendition_ladder = list(video_renditions)
+DEFAULT_RENDITION = "full"
+
+# Viewer backlog check: every DOWNSHIFT_WINDOW sent frames, drop one rendition
+# if more than DOWNSHIFT_SKIP_RATIO of that rendition's frames were skipped
+DOWNSHIFT_WINDOW = 30
+DOWNSHIFT_SKIP_RATIO = 0.5
+# After UPSHIFT_CLEAN_WINDOWS windows in a row without a skipped frame, move a
+# viewer back up one rendition, never above the one it asked for
+UPSHIFT_CLEAN_WINDOWS = 3
+
+# Subscriber counts per rendition; only subscribed renditions are encoded
+rendition_subscribers = {name: 0 for name in video_renditions}
+rendition_lock = threading.Lock()
+
+# Latest annotated image from the frame thread, waiting to be encoded
+latest_image = None
+image_seq = 0
+image_condition = threading.Condition()
+
+# Latest multipart part per rendition as (rendition seq, part), shared by every viewer
+latest_frames = {}
+frame_condition = threading.Condition()
+frame_listeners = []  # Called from the encoder thread after each new frame
+frame_thread = None
+encode_thread = None
+frame_viewers = 0  # The frame loop and camera run only while this is above zero
+frame_thread_lock = threading.Lock()
+
+# Function to Subscribe a Viewer to a Rendition
+def subscribe_rendition(name):
+    with rendition_lock:
+        rendition_subscribers[name] += 1
+
+# Function to Unsubscribe a Viewer from a Rendition
+def unsubscribe_rendition(name):
+    with rendition_lock:
+        rendition_subscribers[name] = max(rendition_subscribers[name] - 1, 0)
+        idle = rendition_subscribers[name] == 0
+    if idle:
+        with frame_condition:
+            latest_frames.pop(name, None)  # Don't serve a stale frame to the next viewer
+
+# Function to Publish Encoded Parts to all Viewers
+def publish_frame(parts):
+    with frame_condition:
+        for name, part in parts.items():
+            latest_frames[name] = (latest_frames.get(name, (0, None))[0] + 1, part)
+        frame_condition.notify_all()
+    for listener in list(frame_listeners):
+        listener()
+
+# Function to Publish a Text Status Part to every Subscribed Rendition
+def publish_status(message):
+    part = (b'--frame\r\n'
+            b'Content-Type: text/plain\r\n\r\n' + message + b'\r\n')
+    with rendition_lock:
+        names = [name for name, count in rendition_subscribers.items() if count > 0]
+    publish_frame({name: part for name in names})
+
+# Function to Hand an Annotated Image to the Encoder Thread
+def publish_image(img):
+    global latest_image, image_seq
+    with image_condition:
+        latest_image = img
+        image_seq += 1
+        image_condition.notify()
+
+# Encoder thread: encodes each subscribed rendition at most once per frame
+def encode_loop():
+    seq = 0
+    next_due = {name: 0.0 for name in video_renditions}
+    while True:
+        with image_condition:
+            image_condition.wait_for(lambda: image_seq != seq)
+            seq, img = image_seq, latest_image
+        
+        now = time.monotonic()
+        parts = {}
+        scaled = {}
+        for name, rendition in video_renditions.items():
+            if rendition_subscribers[name] <= 0 or now + 0.005 < next_due[name]:
+                continue
+            # Keep to the fps grid, restarting it from now after an idle gap
+            period = 1.0 / rendition["fps"]
+            next_due[name] = next_due[name] + period if next_due[name] + period > now else now + period
+            
+            try:
+                scale = rendition["scale"]
+                if scale not in scaled:
+                    scaled[scale] = img if scale == 1.0 else cv2.resize(
+                        img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                
+                # Convert to JPEG for web streaming
+                ret, buffer = cv2.imencode('.jpg', scaled[scale],
+                                           [cv2.IMWRITE_JPEG_QUALITY, rendition["quality"]])
+                if ret:
+                    parts[name] = (b'--frame\r\n'
+                                   b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+            except Exception as e:
+                logger.error(f"Error encoding {name} rendition: {e}")
+        
+        if parts:
+            publish_frame(parts)
+
+# Function to Join the Shared Frame and Encoder Loops (started on the first viewer)
+def start_frame_loop():
+    global frame_thread, encode_thread, frame_viewers
+    with frame_thread_lock:
+        frame_viewers += 1
+        if encode_thread is None or not encode_thread.is_alive():
+            encode_thread = threading.Thread(target=encode_loop, name="airpiano-encoder", daemon=True)
+            encode_thread.start()
+        if frame_thread is None or not frame_thread.is_alive():
+            frame_thread = threading.Thread(target=frame_loop, name="airpiano-frames", daemon=True)
+            frame_thread.start()
+
+# Function to Leave the Frame Loop; it stops after the last viewer leaves
+def leave_frame_loop():
+    global frame_viewers
+    with frame_thread_lock:
+        frame_viewers = max(frame_viewers - 1, 0)
+
+# Function to Check whether the Frame Loop is Still Producing Frames
+def frame_loop_running():
+    thread = frame_thread
+    return thread is not None and thread.is_alive()
+
+class VideoViewer:
+    """One /video_feed client: its rendition, last frame sent and backlog"""
+    
+    def __init__(self, rendition=DEFAULT_RENDITION, auto=True):
+        self.requested = rendition
+        self.rendition = rendition
+        self.auto = auto
+        self.seq = 0
+        self.sent = 0
+        self.skipped = 0
+        self.clean_windows = 0
+        subscribe_rendition(rendition)
+        start_frame_loop()
+    
+    def has_new(self):
+        return latest_frames.get(self.rendition, (self.seq, None))[0] != self.seq
+    
+    def take(self):
+        """Return the newest part for this viewer, or None if there is none yet"""
+        seq, part = latest_frames.get(self.rendition, (self.seq, None))
+        if seq == self.seq:
+            return None
+        
+        # Frames published while this viewer was still sending were skipped
+        if self.seq:
+            self.skipped += max(seq - self.seq - 1, 0)
+        self.seq = seq
+        self.sent += 1
+        if self.auto and self.sent >= DOWNSHIFT_WINDOW:
+            self.clean_windows = self.clean_windows + 1 if self.skipped == 0 else 0
+            if self.skipped > DOWNSHIFT_SKIP_RATIO * (self.sent + self.skipped):
+                self.shift(1, "fell behind")
+            elif self.clean_windows >= UPSHIFT_CLEAN_WINDOWS:
+                self.shift(-1, "caught up")
+            self.sent = self.skipped = 0
+        return part
+    
+    def shift(self, step, reason):
+        """Move `step` places along the ladder, staying between the requested rendition and the last"""
+        position = rendition_ladder.index(self.rendition) + step
+        if not rendition_ladder.index(self.requested) <= position < len(rendition_ladder):
+            return
+        target = rendition_ladder[position]
+        subscribe_rendition(target)
+        unsubscribe_rendition(self.rendition)
+        logger.info(f"Video viewer {reason}, moving from {self.rendition} to {target}")
+        self.rendition = target
+        self.seq = 0
+        self.clean_windows = 0
+    
+    def close(self):
+        unsubscribe_rendition(self.rendition)
+        leave_frame_loop()
+
+# Function to Generate Camera Frames for one viewer
+def generate_frames(rendition=DEFAULT_RENDITION, auto=True):
+    viewer = VideoViewer(rendition, auto)
+    try:
+        while True:
+            with frame_condition:
+                ready = frame_condition.wait_for(viewer.has_new, timeout=1.0)
+            if not ready:
+                if not frame_loop_running():
+                    return
+                continue
+            part = viewer.take()
+            if part is not None:
+                yield part
+    finally:
+        viewer.close()
+
+# Function to Capture, Track and Encode Camera Frames (runs on the frame thread)
+def frame_loop():
+    global tracking_active, active_hands, performance_metrics, frame_thread, cap
     
     if not initialize_camera():
-        yield (b'--frame\r\n'
-               b'Content-Type: text/plain\r\n\r\n'
-               b'Camera initialization failed\r\n')
+        publish_status(b'Camera initialization failed')
         return
     
     # Start performance tracking
@@ -290,12 +608,25 @@ def generate_frames():
         performance_metrics["session_start"] = time.time()
     
     while True:
+        # Stop with the last viewer so an idle server doesn't run the camera and tracking
+        with frame_thread_lock:
+            if frame_viewers == 0:
+                # Finish before a new viewer can start the next loop: let held
+                # chords ring out and start the next session from scratch
+                cap.release()
+                cap = None
+                for hand_type in ("left", "right"):
+                    release_hand_chords(hand_type)
+                active_hands = []
+                finger_filter.reset()
+                onset_predictor.reset()
+                frame_thread = None
+                break
+        
         success, img = cap.read()
         if not success:
             logger.warning("Camera not capturing frames")
-            yield (b'--frame\r\n'
-                   b'Content-Type: text/plain\r\n\r\n'
-                   b'Camera not capturing frames\r\n')
+            publish_status(b'Camera not capturing frames')
             time.sleep(0.5)
             continue
 
@@ -315,13 +646,32 @@ def generate_frames():
             active_hands = []
             # Find hands
             hands, img = detector.findHands(img, draw=True)
+            hand_fingers = [detector.fingersUp(hand) for hand in hands]
+            now = time.perf_counter()
+            
+            # Fingers predicted to come up in the next frames count as up already
+            predicted = [None] * len(hands)
+            confirmed = None
+            if settings["onset_prediction"]:
+                predicted, cancelled = onset_predictor.update_hands(hands, now)
+                confirmed = onset_predictor.confirmed
+                for slot in np.flatnonzero(cancelled.any(axis=1)):
+                    cancel_predicted_chords(("left", "right")[slot], cancelled[slot])
+            
+            # Debounce raw finger states; hands lost past the grace period are released.
+            # Confirmed predictions latch straight to up so the chord they started keeps playing.
+            filtered_fingers, released_slots = finger_filter.update_hands(hands, hand_fingers, now, latch=confirmed)
             
             if hands:
                 performance_metrics["hands_detected"] += 1
-                for hand in hands:
+                for hand, fingers, hand_predicted in zip(hands, filtered_fingers, predicted):
                     hand_type = "left" if hand["type"] == "Left" else "right"
                     active_hands.append(hand_type)
-                    fingers = detector.fingersUp(hand)
+                    confirm_predicted_chords(hand_type, fingers)
+                    lead = [0] * 5  # Fingers that are up only because of a prediction
+                    if hand_predicted is not None:
+                        lead = [int(p) & (1 - finger) for finger, p in zip(fingers, hand_predicted)]
+                        fingers = [finger | int(p) for finger, p in zip(fingers, hand_predicted)]
                     
                     # Process finger combinations first
                     combo_played = False
@@ -334,17 +684,16 @@ def generate_frames():
                                 # Play combo chord if state changed
                                 if prev_states["combo"][hand_type][combo_name] == 0:
                                     play_chord(combo_data["notes"], combo_data["name"])
+                                    if lead[indices[0]] or lead[indices[1]]:
+                                        predicted_chords[("combo", hand_type, combo_name)] = {
+                                            idx for idx in indices if lead[idx]}
                                     
                                 prev_states["combo"][hand_type][combo_name] = 1
                                 combo_played = True
                             elif prev_states["combo"][hand_type][combo_name] == 1:
                                 # Stop combo chord if state changed
                                 combo_data = combo_chords[hand_type][combo_name]
-                                threading.Thread(
-                                    target=stop_chord_after_delay, 
-                                    args=(combo_data["notes"], combo_data["name"]), 
-                                    daemon=True
-                                ).start()
+                                stop_chord_after_delay(combo_data["notes"], combo_data["name"])
                                 prev_states["combo"][hand_type][combo_name] = 0
                     
                     # If no combo chord played, check individual fingers
@@ -355,12 +704,10 @@ def generate_frames():
                                 
                                 if fingers[finger_idx] == 1 and prev_states["single"][hand_type][finger_name] == 0:
                                     play_chord(chord_data["notes"], chord_data["name"])
+                                    if lead[finger_idx]:
+                                        predicted_chords[("single", hand_type, finger_name)] = {finger_idx}
                                 elif fingers[finger_idx] == 0 and prev_states["single"][hand_type][finger_name] == 1:
-                                    threading.Thread(
-                                        target=stop_chord_after_delay, 
-                                        args=(chord_data["notes"], chord_data["name"]), 
-                                        daemon=True
-                                    ).start()
+                                    stop_chord_after_delay(chord_data["notes"], chord_data["name"])
                                 
                                 prev_states["single"][hand_type][finger_name] = fingers[finger_idx]
                     
@@ -370,31 +717,14 @@ def generate_frames():
                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, 
                               (255, 255, 0), 2)
             
-            # If no hands are detected, stop all active notes
-            if not hands and active_chords:
-                for finger_name in finger_indices:
-                    for hand_type in ["left", "right"]:
-                        if finger_name in single_chords[hand_type]:
-                            if prev_states["single"][hand_type][finger_name] == 1:
-                                chord_data = single_chords[hand_type][finger_name]
-                                threading.Thread(
-                                    target=stop_chord_after_delay, 
-                                    args=(chord_data["notes"], chord_data["name"]), 
-                                    daemon=True
-                                ).start()
-                                prev_states["single"][hand_type][finger_name] = 0
-                
-                for combo_name in finger_pairs:
-                    for hand_type in ["left", "right"]:
-                        if combo_name in combo_chords[hand_type]:
-                            if prev_states["combo"][hand_type][combo_name] == 1:
-                                combo_data = combo_chords[hand_type][combo_name]
-                                threading.Thread(
-                                    target=stop_chord_after_delay, 
-                                    args=(combo_data["notes"], combo_data["name"]), 
-                                    daemon=True
-                                ).start()
-                                prev_states["combo"][hand_type][combo_name] = 0
+            # Stop the notes of hands that stayed lost past the grace period
+            for slot in released_slots:
+                release_hand_chords(("left", "right")[slot])
+
+            # Log landmarks and finger states for the current recording
+            rec = recording
+            if rec is not None:
+                rec.landmarks.append(hands, hand_fingers)
 
         # Add display of active chord names
         if active_chords:
@@ -413,16 +743,14 @@ def generate_frames():
         cv2.putText(img, f"Instrument: {instr_name}", (20, 70), cv2.FONT_HERSHEY_SIMPLEX, 
                     0.6, (255, 200, 0), 2)
             
-        # Convert to JPEG for web streaming
-        ret, buffer = cv2.imencode('.jpg', img)
-        frame = buffer.tobytes()
-        
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+        # Encoding happens on the encoder thread, once per subscribed rendition
+        publish_image(img)
 
         # Update session duration
         if performance_metrics["session_start"] is not None:
             performance_metrics["session_duration"] = time.time() - performance_metrics["session_start"]
+    
+    logger.info("Last viewer left, camera released")
 
 
 # Routes
@@ -431,19 +759,35 @@ def index():
     """Serve the index page"""
     return render_template('index.html')
 
+# Function to Read the Rendition Query Parameters of a /video_feed Request
+def video_feed_options(args):
+    rendition = args.get('quality', DEFAULT_RENDITION)
+    if rendition not in video_renditions:
+        raise ValueError(f"Unknown quality: {rendition} (choose from {', '.join(rendition_ladder)})")
+    auto = args.get('auto', '1').lower() not in ('0', 'false', 'no')
+    return rendition, auto
+
 @app.route('/video_feed')
 def video_feed():
-    """Return the video feed"""
-    return Response(generate_frames(),
+    """Return the video feed (?quality=full|high|medium|low|thumb, ?auto=0 to pin it)"""
+    try:
+        rendition, auto = video_feed_options(request.args)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return Response(generate_frames(rendition, auto),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
+# Function to Build the Active Chords Payload
+def active_chords_data():
+    return {
+        "active_chords": active_chords,
+        "active_hands": active_hands
+    }
+
 @app.route('/active_chords')
 def get_active_chords():
     """Return active chords and hands for the UI"""
-    return jsonify({
-        "active_chords": active_chords,
-        "active_hands": active_hands
-    })
+    return jsonify(active_chords_data())
 
 @app.route('/chords_data')
 def get_chords_data():
@@ -492,6 +836,9 @@ def switch_instrument():
                 fs.program_change(0, instrument_id)
             elif player:
                 player.set_instrument(instrument_id)
+            rec = recording
+            if rec is not None:
+                rec.midi.program_change(instrument_id)
             logger.info(f"Switched to instrument {instrument_id}: {instruments.get(instrument_id, 'Instrument')}")
             return jsonify({
                 "status": "success", 
@@ -521,6 +868,34 @@ def update_settings():
             if detector:
                 detector.updateDetectionCon(settings['sensitivity'])
         
+        if 'filter_window' in data or 'filter_required' in data:
+            window = int(data.get('filter_window', settings['filter_window']))
+            required = int(data.get('filter_required', settings['filter_required']))
+            finger_filter.configure(window, required)
+            settings['filter_window'] = window
+            settings['filter_required'] = required
+            logger.info(f"Updated finger filter to {required} of {window} frames")
+        
+        if 'hand_grace_time' in data:
+            settings['hand_grace_time'] = float(data['hand_grace_time'])
+            finger_filter.grace_time = settings['hand_grace_time']
+            logger.info(f"Updated hand_grace_time to {settings['hand_grace_time']}")
+        
+        if 'onset_prediction' in data:
+            settings['onset_prediction'] = bool(data['onset_prediction'])
+            onset_predictor.reset()
+            logger.info(f"Updated onset_prediction to {settings['onset_prediction']}")
+        
+        if 'onset_lookahead' in data:
+            settings['onset_lookahead'] = float(data['onset_lookahead'])
+            onset_predictor.configure(lookahead=settings['onset_lookahead'])
+            logger.info(f"Updated onset_lookahead to {settings['onset_lookahead']}")
+        
+        if 'onset_cancel_window' in data:
+            settings['onset_cancel_window'] = float(data['onset_cancel_window'])
+            onset_predictor.configure(cancel_window=settings['onset_cancel_window'])
+            logger.info(f"Updated onset_cancel_window to {settings['onset_cancel_window']}")
+        
         if 'volume' in data:
             settings['volume'] = int(data['volume'])
             logger.info(f"Updated volume to {settings['volume']}")
@@ -579,10 +954,9 @@ def adjust_camera():
         logger.error(f"Error adjusting camera: {e}")
         return jsonify({"status": "error", "message": str(e)})
 
-@app.route('/get_status', methods=['GET'])
-def get_status():
-    """Get the current status of the system"""
-    return jsonify({
+# Function to Build the System Status Payload
+def status_data():
+    return {
         "tracking_active": tracking_active,
         "settings": settings,
         "camera_data": camera_data,
@@ -594,8 +968,17 @@ def get_status():
             "chords_played": performance_metrics["chords_played"],
             "session_duration": round(performance_metrics["session_duration"], 2) if performance_metrics["session_duration"] else 0
         },
-        "midi_available": player is not None or fs is not None
-    })
+        "onset_stats": onset_predictor.stats,
+        "filter_stats": finger_filter.stats,
+        "midi_available": player is not None or fs is not None,
+        "recording": recording is not None,
+        "video_subscribers": dict(rendition_subscribers)
+    }
+
+@app.route('/get_status', methods=['GET'])
+def get_status():
+    """Get the current status of the system"""
+    return jsonify(status_data())
 
 @app.route('/reset_metrics', methods=['POST'])
 def reset_metrics():
@@ -609,6 +992,8 @@ def reset_metrics():
             "session_start": time.time(),
             "session_duration": 0
         }
+        finger_filter.reset_stats()
+        onset_predictor.reset_stats()
         logger.info("Performance metrics reset")
         return jsonify({"status": "success", "message": "Metrics reset successfully"})
     except Exception as e:
@@ -652,13 +1037,66 @@ def save_custom_chord():
         logger.error(f"Error saving custom chord: {e}")
         return jsonify({"status": "error", "message": str(e)})
 
+@app.route('/start_recording', methods=['POST'])
+def start_recording():
+    """Start recording played notes to MIDI and hand landmarks to a log"""
+    global recording
+    try:
+        if recording is not None:
+            return jsonify({"status": "error", "message": "Already recording"})
+        
+        recording = RecordingSession(RECORDINGS_DIR, program=current_instrument)
+        logger.info(f"Recording started: {recording.name}")
+        return jsonify({"status": "success", "name": recording.name})
+    except Exception as e:
+        logger.error(f"Error starting recording: {e}")
+        return jsonify({"status": "error", "message": str(e)})
+
+@app.route('/stop_recording', methods=['POST'])
+def stop_recording():
+    """Stop recording and finalize the MIDI file and landmark log"""
+    global recording, last_recording
+    try:
+        if recording is None:
+            return jsonify({"status": "error", "message": "Not recording"})
+        
+        session, recording = recording, None
+        summary = session.stop()
+        last_recording = session
+        logger.info(f"Recording stopped: {session.name} ({summary['frames']} frames)")
+        return jsonify({"status": "success", "recording": summary})
+    except Exception as e:
+        logger.error(f"Error stopping recording: {e}")
+        return jsonify({"status": "error", "message": str(e)})
+
+@app.route('/download_recording')
+def download_recording():
+    """Download the last recording (?kind=midi or ?kind=landmarks)"""
+    if last_recording is None:
+        return jsonify({"status": "error", "message": "No finished recording"}), 404
+    
+    kind = request.args.get('kind', 'midi')
+    if kind == 'midi':
+        path = last_recording.midi_path
+    elif kind == 'landmarks':
+        path = last_recording.landmarks_path
+    else:
+        return jsonify({"status": "error", "message": f"Unknown recording kind: {kind}"}), 400
+    
+    return send_file(os.path.abspath(path), as_attachment=True,
+                     download_name=os.path.basename(path))
+
 # Cleanup function when server shuts down
 def cleanup():
     """Cleanup resources when application exits"""
-    global cap, player, fs
+    global cap, player, fs, recording
     if cap:
         cap.release()
     
+    if recording is not None:
+        recording.stop()
+        recording = None
+    
     if player:
         del player
     